@@ -5,11 +5,12 @@
 # requirements.txt - Production dependencies
 fastapi == 0.109.0
 uvicorn[standard] == 0.27.0
+orjson == 3.9.10
 pydantic == 2.5.3
 pydantic-settings == 2.1.0
-sqlalchemy == 2.0.25
+sqlalchemy[asyncio] == 2.0.25
 alembic == 1.13.1
-psycopg2-binary == 2.9.9
+asyncpg == 0.29.0
 redis == 5.0.1
 python-jose[cryptography] == 3.3.0
 passlib[bcrypt] == 1.7.4
@@ -22,7 +23,11 @@ pytest == 7.4.3
 pytest-asyncio == 0.21.1
 pytest-cov == 4.1.0
 pytest-mock == 3.12.0
+pytest-xdist == 3.5.0
+pytest-testmon == 2.1.1
 httpx == 0.25.2
+aiosqlite == 0.19.0
+fakeredis == 2.21.0
 
 # Code quality
 black == 23.12.1
@@ -36,20 +41,29 @@ isort == 5.13.2
 # Place in: services/product-service/Makefile
 #           services/user-service/Makefile
 
-.PHONY: install test coverage lint format clean
+.PHONY: install test test-fast test-integration coverage lint format clean
 
 install:
-    pip install - r requirements.txt
-    pip install - r requirements-dev.txt
+    uv pip install -r requirements.txt
+    uv pip install -r requirements-dev.txt
 
 test:
     pytest
 
+# Only re-run tests affected by changes since the last run (serially; the
+# selected set is usually small)
+test-fast:
+    pytest --testmon -n 0
+
+# Integration tests are deselected by default (-m "not integration" in pytest.ini)
+test-integration:
+    pytest -m integration
+
 coverage:
-    pytest - -cov = app - -cov-report = html - -cov-report = xml - -cov-report = term
+    pytest --cov=app --cov-branch --cov-report=html --cov-report=xml --cov-report=term-missing
 
 test-ci:
-    pytest - -cov = app - -cov-report = xml - -junitxml = junit.xml - v
+    pytest --cov=app --cov-branch --cov-report=xml --cov-fail-under=80 --junitxml=junit.xml -v
 
 lint:
     flake8 app tests
@@ -65,6 +79,7 @@ clean:
     rm - rf .coverage
     rm - f coverage.xml
     rm - f junit.xml
+    rm -f .testmondata
     find . -type d - name __pycache__ - exec rm - rf {} +
     find . -type f - name "*.pyc" - delete
 
@@ -76,6 +91,9 @@ make test
 # or
 pytest
 
+# Run only tests affected by your changes:
+make test-fast
+
 # Run with coverage:
 make coverage
 # or
@@ -159,8 +177,9 @@ npm run type-check
 cd services/product-service
 python - m venv venv
 source venv/bin/activate  # On Windows: venv\Scripts\activate
-pip install - r requirements.txt
-pip install - r requirements-dev.txt
+pip install uv  # much faster resolver/installer than pip
+uv pip install -r requirements.txt
+uv pip install -r requirements-dev.txt
 
 # For frontend service:
 cd services/frontend-service
@@ -0,0 +1,11 @@
+"""
+Histogram bucket boundaries for metrics exported by more than one service
+Dashboards sum these histograms across services by `le`, which is only valid
+when every service exports the same buckets
+"""
+
+# Each bucket is one more series per label set; keep one at or above the 3s
+# SlowResponseTime alert threshold or histogram_quantile() can never reach it
+HTTP_REQUEST_DURATION_BUCKETS = (0.05, 0.1, 0.5, 1.0, 5.0)
+
+DATABASE_QUERY_DURATION_BUCKETS = (0.005, 0.05, 0.5)
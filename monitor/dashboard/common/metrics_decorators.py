@@ -0,0 +1,227 @@
+"""
+Shared HTTP endpoint instrumentation for the Python services
+Each service keeps its own metric definitions and binds them to the decorator here
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi import Request
+from functools import lru_cache
+from starlette.exceptions import HTTPException
+from starlette.requests import ClientDisconnect
+import asyncio
+import inspect
+import re
+import sys
+from time import perf_counter
+
+# nginx's "client closed request": the client went away, the service did not fail
+STATUS_CLIENT_CLOSED_REQUEST = 499
+
+# Method label when a wrapped handler is called without a Request, e.g. directly
+METHOD_UNKNOWN = 'unknown'
+
+# Keyword-only parameter added to handlers that take no Request of their own,
+# so FastAPI passes one in and the method label is always the real one
+_INJECTED_REQUEST = '_metrics_request'
+
+
+# Path segments that are concrete values rather than {placeholders}
+_CONCRETE_SEGMENT = re.compile(
+    r'^(\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})$',
+    re.IGNORECASE
+)
+
+
+def route_template(path):
+    """
+    Validate and intern an endpoint label value
+
+    Endpoint labels must be route templates (/api/users/{user_id}), never
+    concrete URLs (/api/users/42): every distinct value is a new series.
+    """
+    if any(_CONCRETE_SEGMENT.match(segment) for segment in path.split('/')):
+        raise ValueError(
+            f"Endpoint label {path!r} looks like a concrete URL; "
+            "use the route template, e.g. /api/users/{user_id}"
+        )
+    return sys.intern(path)
+
+
+class _CounterBuffer:
+    """Counter increments deferred until the end of a request"""
+
+    __slots__ = ('counts', 'closed')
+
+    def __init__(self):
+        self.counts = {}
+        self.closed = False
+
+    def flush(self):
+        # Tasks spawned by the request share this buffer; once it is closed
+        # their increments are applied directly instead of being dropped
+        self.closed = True
+        for inc, amount in self.counts.items():
+            inc(amount)
+        self.counts.clear()
+
+
+_counter_buffer = ContextVar('metrics_counter_buffer', default=None)
+
+
+@contextmanager
+def buffered_metrics():
+    """
+    Collect buffered_inc() calls made in this context and apply them at exit
+
+    Repeated increments of the same counter child within a request become a
+    single inc(n).
+    """
+    buffer = _CounterBuffer()
+    token = _counter_buffer.set(buffer)
+    try:
+        yield
+    finally:
+        _counter_buffer.reset(token)
+        buffer.flush()
+
+
+def buffered_inc(inc):
+    """
+    Call a bound Counter.inc, deferred to the enclosing buffered_metrics() if any
+
+    Histograms are not buffered: their observations must stay individual
+    samples for the buckets to be correct.
+    """
+    buffer = _counter_buffer.get()
+    if buffer is None or buffer.closed:
+        inc()
+        return
+    counts = buffer.counts
+    counts[inc] = counts.get(inc, 0) + 1
+
+
+def light_wraps(func):
+    """
+    Minimal functools.wraps for the metrics wrappers
+
+    Copies only what FastAPI reads: __wrapped__ (so the handler's signature is
+    used for parameter parsing), the name and the docstring (route summary and
+    description). The wrapped function's __dict__ is not merged in.
+    """
+    def decorator(wrapper):
+        wrapper.__wrapped__ = func
+        wrapper.__name__ = func.__name__
+        wrapper.__qualname__ = func.__qualname__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+    return decorator
+
+
+def _request_parameter(func):
+    """
+    Name of func's Request parameter, adding one to its signature if it has none
+
+    Returns (name, signature); signature is None unless a parameter was added,
+    in which case it must be removed from the keyword arguments before func is
+    called.
+    """
+    # Resolve string annotations ("Request", from __future__ import annotations)
+    # the way FastAPI does, or a handler's own Request would go unnoticed
+    signature = inspect.signature(func, eval_str=True)
+    for parameter in signature.parameters.values():
+        annotation = parameter.annotation
+        if isinstance(annotation, type) and issubclass(annotation, Request):
+            return parameter.name, None
+
+    parameters = list(signature.parameters.values())
+    injected = inspect.Parameter(
+        _INJECTED_REQUEST, inspect.Parameter.KEYWORD_ONLY, annotation=Request
+    )
+    # Keyword-only parameters must come before **kwargs
+    position = len(parameters)
+    if parameters and parameters[-1].kind is inspect.Parameter.VAR_KEYWORD:
+        position -= 1
+    parameters.insert(position, injected)
+    return _INJECTED_REQUEST, signature.replace(parameters=parameters)
+
+
+def make_track_endpoint_metrics(requests_total, duration_seconds):
+    """
+    Build a track_endpoint_metrics decorator for a service's HTTP metrics
+
+    requests_total is a Counter labeled [method, endpoint, status] and
+    duration_seconds a Histogram labeled [method, endpoint].
+    """
+    def track_endpoint_metrics(endpoint_name, method=None):
+        """Decorator to track HTTP endpoint metrics
+
+        endpoint_name must be the route template, not a concrete URL; see
+        route_template(). When `method` is None the method label is taken from
+        the request: handlers without a Request parameter get one added to the
+        signature FastAPI sees.
+        """
+        route = route_template(endpoint_name)
+
+        def decorator(func):
+            # Bound inc/observe methods of the label children per (method, status)
+            # for this endpoint; the handful of methods and statuses keeps these
+            # caches small
+            @lru_cache(maxsize=64)
+            def count_request(request_method, status_code):
+                return requests_total.labels(request_method, route, status_code).inc
+
+            @lru_cache(maxsize=16)
+            def observe_duration(request_method):
+                return duration_seconds.labels(request_method, route).observe
+
+            request_parameter, injected_signature = (
+                _request_parameter(func) if method is None else (None, None)
+            )
+            injected = injected_signature is not None
+
+            @light_wraps(func)
+            async def wrapper(*args, **kwargs):
+                start_time = perf_counter()
+                status_code = 200
+
+                request_method = method
+                if request_method is None:
+                    # FastAPI passes handler parameters as keyword arguments
+                    if injected:
+                        request = kwargs.pop(request_parameter, None)
+                    else:
+                        request = kwargs.get(request_parameter)
+                    request_method = (
+                        request.method if request is not None else METHOD_UNKNOWN
+                    )
+
+                try:
+                    with buffered_metrics():
+                        response = await func(*args, **kwargs)
+                    status_code = getattr(response, 'status_code', 200)
+                    return response
+                except (asyncio.CancelledError, ClientDisconnect):
+                    status_code = STATUS_CLIENT_CLOSED_REQUEST
+                    raise
+                except HTTPException as exc:
+                    # Deliberate error responses (401, 404, ...), not failures
+                    status_code = exc.status_code
+                    raise
+                except Exception:
+                    status_code = 500
+                    raise
+                finally:
+                    duration = perf_counter() - start_time
+
+                    # Track request count and duration
+                    count_request(request_method, status_code)()
+                    observe_duration(request_method)(duration)
+
+            if injected:
+                # Takes precedence over __wrapped__ in inspect.signature()
+                wrapper.__signature__ = injected_signature
+            return wrapper
+        return decorator
+
+    return track_endpoint_metrics
@@ -0,0 +1,51 @@
+"""
+Shared metric recording helpers and the /metrics renderer for the Python services
+Label values are passed to .labels() positionally, in the order the metric
+declares its label names; keyword calls are validated name by name
+"""
+
+from .metrics_decorators import buffered_inc
+from prometheus_client import generate_latest
+import time
+
+
+def make_track_cache_result(cache_results_total):
+    """
+    Build a track_cache_result helper for a service's cache metrics
+
+    cache_results_total is a Counter labeled [cache_key_type, result].
+    """
+    # Bound inc methods keyed by (key_type, hit)
+    counters = {}
+
+    def track_cache_result(key_type: str, hit: bool):
+        """Track a cache hit or miss"""
+        key = (key_type, hit)
+        count_result = counters.get(key)
+        if count_result is None:
+            count_result = cache_results_total.labels(
+                key_type,
+                'hit' if hit else 'miss'
+            ).inc
+            counters[key] = count_result
+        buffered_inc(count_result)
+
+    return track_cache_result
+
+
+# Scrapes arriving within this window share a single generate_latest() pass,
+# so scrape resolution is bounded by the TTL
+METRICS_CACHE_TTL_SECONDS = 1.0
+
+_metrics_cache = {"t": float("-inf"), "body": b""}
+
+
+async def get_metrics():
+    """Return Prometheus metrics in text format, re-rendered at most once per TTL"""
+    # No lock: nothing between the check and the refresh awaits, so concurrent
+    # scrapes on the event loop cannot interleave here
+    now = time.monotonic()
+    if now - _metrics_cache["t"] >= METRICS_CACHE_TTL_SECONDS:
+        _metrics_cache["body"] = generate_latest()
+        _metrics_cache["t"] = now
+    return _metrics_cache["body"]
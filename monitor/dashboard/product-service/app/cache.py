@@ -0,0 +1,31 @@
+"""
+Redis client for the Product Service
+A single connection pool is shared by every cache operation in the process;
+routes take the client via Depends(get_redis) so tests can swap in fakeredis
+"""
+
+import os
+
+import redis.asyncio as redis
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis-service:6379/0")
+
+# Once every pooled connection is in use, callers wait up to the timeout for
+# one to be released instead of failing with "Too many connections"
+REDIS_MAX_CONNECTIONS = 64
+REDIS_POOL_TIMEOUT_SECONDS = 5
+
+# Connections are opened lazily and reused across requests
+pool = redis.BlockingConnectionPool.from_url(
+    REDIS_URL,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_POOL_TIMEOUT_SECONDS,
+    decode_responses=True
+)
+
+redis_client = redis.Redis(connection_pool=pool)
+
+
+def get_redis() -> redis.Redis:
+    """FastAPI dependency returning the shared Redis client"""
+    return redis_client
@@ -5,12 +5,21 @@ Example integration of Prometheus metrics into FastAPI
 
 from fastapi import FastAPI, Response, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+# ORJSONResponse needs orjson installed (see requirements.txt); without it
+# every JSON response fails to render
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
+from prometheus_client import CONTENT_TYPE_LATEST
 from typing import Optional, List
+import asyncio
 import uvicorn
-import time
+from time import perf_counter
+import os
 
-# Import our metrics module
+from .common.metrics_decorators import buffered_metrics
+
+# Import our cache client and metrics module
+from .cache import pool
 from .metrics import (
     get_metrics,
     track_product_view,
@@ -18,18 +27,18 @@ from .metrics import (
     track_product_search,
     update_product_inventory,
     update_product_price,
-    track_endpoint_metrics,
+    update_product_info,
     track_database_query,
-    track_cache_operation,
-    http_requests_total,
-    http_request_duration_seconds,
+    record_cache_get,
+    track_http_request,
 )
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Product Service",
     description="E-Commerce Product Management Service with Prometheus Metrics",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -49,25 +58,23 @@ app.add_middleware(
 @app.middleware("http")
 async def track_requests(request: Request, call_next):
     """Middleware to automatically track all HTTP requests"""
-    start_time = time.time()
+    start_time = perf_counter()
 
-    # Process the request
-    response = await call_next(request)
+    # Process the request; counter updates made while handling it are applied
+    # together once it completes
+    with buffered_metrics():
+        response = await call_next(request)
 
-    # Calculate duration
-    duration = time.time() - start_time
+    # Calculate duration (perf_counter is monotonic, unaffected by clock changes)
+    duration = perf_counter() - start_time
 
-    # Track metrics
-    http_requests_total.labels(
-        method=request.method,
-        endpoint=request.url.path,
-        status=response.status_code
-    ).inc()
+    # Label by route template (e.g. /products/{product_id}) rather than the raw
+    # path so path parameters don't create a new series per value
+    route = request.scope.get("route")
+    endpoint = route.path if route is not None else "unmatched"
 
-    http_request_duration_seconds.labels(
-        method=request.method,
-        endpoint=request.url.path
-    ).observe(duration)
+    # Track metrics
+    track_http_request(request.method, endpoint, response.status_code, duration)
 
     return response
 
@@ -108,7 +115,7 @@ async def metrics():
     Prometheus metrics endpoint
     This endpoint exposes all metrics in Prometheus format
     """
-    return Response(content=get_metrics(), media_type="text/plain")
+    return Response(content=await get_metrics(), headers={"Content-Type": CONTENT_TYPE_LATEST})
 
 # =============================================================================
 # Health Check Endpoints
@@ -133,7 +140,6 @@ async def readiness_check():
 
 
 @app.get("/products/{product_id}")
-@track_endpoint_metrics("get_product")
 async def get_product(product_id: str):
     """
     Get a single product by ID
@@ -149,18 +155,21 @@ async def get_product(product_id: str):
         "inventory": 100
     }
 
-    # Track the product view
+    # Track the product view; publishing its name keeps the product on the
+    # Top Products panel, which joins views with product_info
     track_product_view(
         product_id=product["id"],
-        product_name=product["name"],
         category=product["category"]
     )
+    update_product_info(
+        product_id=product["id"],
+        product_name=product["name"]
+    )
 
     return product
 
 
 @app.get("/products")
-@track_endpoint_metrics("list_products")
 async def list_products(
     category: Optional[str] = None,
     limit: int = 20,
@@ -169,7 +178,8 @@ async def list_products(
     """
     List products with optional filtering
     """
-    # Simulate database query
+    # Simulate database query (replace with a single bounded SELECT, e.g.
+    # crud.get_products(session, limit=limit, offset=offset))
     products = [
         {
             "id": f"prod-{i}",
@@ -181,16 +191,17 @@ async def list_products(
         for i in range(offset, offset + limit)
     ]
 
-    return {
+    # Plain dicts need no validation; returning the response directly also
+    # skips FastAPI's jsonable_encoder pass over every item
+    return ORJSONResponse({
         "products": products,
         "total": 1000,
         "limit": limit,
         "offset": offset
-    }
+    })
 
 
 @app.post("/products/search")
-@track_endpoint_metrics("search_products")
 async def search_products(search: ProductSearch):
     """
     Search for products
@@ -217,20 +228,13 @@ async def search_products(search: ProductSearch):
 
 
 @app.post("/cart/add")
-@track_endpoint_metrics("add_to_cart")
 async def add_to_cart(item: CartItem):
     """
     Add product to cart
     Tracks: add to cart actions
     """
-    # Get product details (simulated)
-    product_name = f"Product {item.product_id}"
-
     # Track the add to cart action
-    track_add_to_cart(
-        product_id=item.product_id,
-        product_name=product_name
-    )
+    track_add_to_cart(product_id=item.product_id)
 
     return {
         "message": "Product added to cart",
@@ -240,7 +244,6 @@ async def add_to_cart(item: CartItem):
 
 
 @app.post("/products")
-@track_endpoint_metrics("create_product")
 async def create_product(product: Product):
     """
     Create a new product
@@ -248,16 +251,19 @@ async def create_product(product: Product):
     """
     # Simulate product creation
 
+    update_product_info(
+        product_id=product.id,
+        product_name=product.name
+    )
+
     # Update inventory and price metrics
     update_product_inventory(
         product_id=product.id,
-        product_name=product.name,
         quantity=product.inventory
     )
 
     update_product_price(
         product_id=product.id,
-        product_name=product.name,
         price=product.price,
         currency="USD"
     )
@@ -266,7 +272,6 @@ async def create_product(product: Product):
 
 
 @app.put("/products/{product_id}/inventory")
-@track_endpoint_metrics("update_inventory")
 async def update_inventory(product_id: str, quantity: int):
     """
     Update product inventory
@@ -275,7 +280,6 @@ async def update_inventory(product_id: str, quantity: int):
     # Update inventory
     update_product_inventory(
         product_id=product_id,
-        product_name=f"Product {product_id}",
         quantity=quantity
     )
 
@@ -287,7 +291,6 @@ async def update_inventory(product_id: str, quantity: int):
 
 
 @app.put("/products/{product_id}/price")
-@track_endpoint_metrics("update_price")
 async def update_price(product_id: str, price: float):
     """
     Update product price
@@ -296,7 +299,6 @@ async def update_price(product_id: str, price: float):
     # Update price
     update_product_price(
         product_id=product_id,
-        product_name=f"Product {product_id}",
         price=price,
         currency="USD"
     )
@@ -312,13 +314,13 @@ async def update_price(product_id: str, price: float):
 # =============================================================================
 
 
-@track_database_query("select", "products")
 async def get_product_from_db(product_id: str):
     """
     Example function showing database query tracking
     """
-    # Simulate database query
-    await asyncio.sleep(0.01)  # Simulate DB latency
+    with track_database_query("select", "products"):
+        # Simulate database query
+        await asyncio.sleep(0.01)  # Simulate DB latency
     return {"id": product_id, "name": "Sample Product"}
 
 # =============================================================================
@@ -326,17 +328,20 @@ async def get_product_from_db(product_id: str):
 # =============================================================================
 
 
-@track_cache_operation("get", "product")
-async def get_product_from_cache(product_id: str):
+async def get_product_from_cache(product_id: str, cache):
     """
     Example function showing cache operation tracking
+    Routes pass the client from Depends(get_redis)
     """
-    # Simulate cache lookup
-    # Return None for cache miss
-    return None
+    start_time = perf_counter()
+    # Returns None on a cache miss
+    product = await cache.get(f"product:{product_id}")
+    record_cache_get("product", product is not None, perf_counter() - start_time)
+
+    return product
 
 # =============================================================================
-# Startup Event - Initialize Metrics
+# Startup / Shutdown Events
 # =============================================================================
 
 
@@ -349,26 +354,42 @@ async def startup_event():
     # Initialize some default metrics
     # This is useful for establishing baseline metrics
     for i in range(1, 6):
+        update_product_info(
+            product_id=f"prod-{i}",
+            product_name=f"Product {i}"
+        )
         update_product_inventory(
             product_id=f"prod-{i}",
-            product_name=f"Sample Product {i}",
             quantity=100
         )
         update_product_price(
             product_id=f"prod-{i}",
-            product_name=f"Sample Product {i}",
             price=29.99 * i,
             currency="USD"
         )
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled Redis connections on shutdown"""
+    await pool.disconnect()
+
 # =============================================================================
 # Main Entry Point
 # =============================================================================
 
 if __name__ == "__main__":
+    # Reload only in development; uvicorn cannot combine it with multiple workers.
+    # One worker by default: metrics live in a per-process registry, so with
+    # several workers each scrape would read a different process's counters.
+    # Scale with pod replicas instead. uvloop is not available on Windows.
+    dev = bool(os.getenv("DEV"))
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8080,
-        reload=True
+        workers=1 if dev else int(os.getenv("WEB_CONCURRENCY", "1")),
+        loop="auto" if dev else "uvloop",
+        http="httptools",
+        reload=dev
     )
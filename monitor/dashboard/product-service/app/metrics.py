@@ -1,7 +1,14 @@
-from prometheus_client import Counter, Histogram, Gauge, generate_latest
-from functools import wraps
-import time
-//services/product-service/app/metrics.py
+from prometheus_client import Counter, Histogram, Gauge
+from .common.metrics_buckets import (
+    DATABASE_QUERY_DURATION_BUCKETS,
+    HTTP_REQUEST_DURATION_BUCKETS,
+)
+from .common.metrics_decorators import buffered_inc
+from .common.metrics_helpers import get_metrics, make_track_cache_result
+from collections import OrderedDict
+from contextlib import contextmanager
+from time import perf_counter
+# services/product-service/app/metrics.py
 
 
 """
@@ -18,14 +25,29 @@ Tracks business metrics and technical metrics for Prometheus
 product_views_total = Counter(
     'product_views_total',
     'Total number of product views',
-    ['product_id', 'product_name', 'category']
+    ['category']
 )
 
 # Products Added to Cart
 products_added_to_cart_total = Counter(
     'products_added_to_cart_total',
-    'Total number of products added to cart',
-    ['product_id', 'product_name']
+    'Total number of products added to cart'
+)
+
+# Per-product activity, only kept for the most recently active products so the
+# number of product_id series stays bounded regardless of catalog size
+HOT_PRODUCTS_MAX = 1000
+
+hot_product_views_total = Counter(
+    'hot_product_views_total',
+    'Product views for the most recently viewed products',
+    ['product_id']
+)
+
+hot_products_added_to_cart_total = Counter(
+    'hot_products_added_to_cart_total',
+    'Products added to cart for the most recently added products',
+    ['product_id']
 )
 
 # Product Search
@@ -39,14 +61,22 @@ product_search_queries_total = Counter(
 product_inventory_level = Gauge(
     'product_inventory_level',
     'Current inventory level for products',
-    ['product_id', 'product_name']
+    ['product_id']
 )
 
 # Product Price
 product_current_price = Gauge(
     'product_current_price',
     'Current price of products',
-    ['product_id', 'product_name', 'currency']
+    ['product_id', 'currency']
+)
+
+# Product Info - always 1; dashboards join on product_id to show names, so
+# product_name is not repeated as a label on every product metric
+product_info = Gauge(
+    'product_info',
+    'Product metadata',
+    ['product_id', 'product_name']
 )
 
 # =============================================================================
@@ -65,7 +95,7 @@ http_request_duration_seconds = Histogram(
     'http_request_duration_seconds',
     'HTTP request duration in seconds',
     ['method', 'endpoint'],
-    buckets=[0.01, 0.05, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0]
+    buckets=HTTP_REQUEST_DURATION_BUCKETS
 )
 
 # =============================================================================
@@ -77,7 +107,7 @@ database_query_duration_seconds = Histogram(
     'database_query_duration_seconds',
     'Database query duration in seconds',
     ['operation', 'table'],
-    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0]
+    buckets=DATABASE_QUERY_DURATION_BUCKETS
 )
 
 # Database Connections
@@ -101,16 +131,10 @@ database_connections_max = Gauge(
 # =============================================================================
 
 # Redis Cache Hits/Misses
-redis_cache_hits_total = Counter(
-    'redis_cache_hits_total',
-    'Total number of cache hits',
-    ['cache_key_type']
-)
-
-redis_cache_misses_total = Counter(
-    'redis_cache_misses_total',
-    'Total number of cache misses',
-    ['cache_key_type']
+redis_cache_results_total = Counter(
+    'redis_cache_results_total',
+    'Total number of cache lookups by result',
+    ['cache_key_type', 'result']  # result: hit, miss
 )
 
 # Redis Operations
@@ -125,149 +149,168 @@ redis_operation_duration_seconds = Histogram(
     'redis_operation_duration_seconds',
     'Redis operation duration in seconds',
     ['operation'],
-    buckets=[0.001, 0.005, 0.01, 0.05, 0.1]
+    buckets=[0.001, 0.005, 0.05]
 )
 
 # =============================================================================
-# Decorator Functions
+# Context Managers
 # =============================================================================
 
 
-def track_endpoint_metrics(endpoint_name):
-    """Decorator to track HTTP endpoint metrics"""
-    def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            start_time = time.time()
-            status_code = 200
-
-            try:
-                response = await func(*args, **kwargs)
-                if hasattr(response, 'status_code'):
-                    status_code = response.status_code
-                return response
-            except Exception as e:
-                status_code = 500
-                raise
-            finally:
-                duration = time.time() - start_time
-
-                # Track request count
-                http_requests_total.labels(
-                    method='GET',  # or extract from request
-                    endpoint=endpoint_name,
-                    status=status_code
-                ).inc()
-
-                # Track request duration
-                http_request_duration_seconds.labels(
-                    method='GET',
-                    endpoint=endpoint_name
-                ).observe(duration)
-
-        return wrapper
-    return decorator
+# Bound inc/observe methods of label children, cached by label values so
+# repeated queries and cache operations skip prometheus_client's labels() lookup
+_db_duration_observers = {}
+_cache_operation_recorders = {}
 
 
+@contextmanager
 def track_database_query(operation, table):
-    """Decorator to track database query metrics"""
-    def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            start_time = time.time()
-
-            try:
-                result = await func(*args, **kwargs)
-                return result
-            finally:
-                duration = time.time() - start_time
-                database_query_duration_seconds.labels(
-                    operation=operation,
-                    table=table
-                ).observe(duration)
-
-        return wrapper
-    return decorator
-
-
-def track_cache_operation(operation, key_type):
-    """Decorator to track cache operations"""
-    def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            start_time = time.time()
-
-            try:
-                result = await func(*args, **kwargs)
-
-                # Track hit/miss for get operations
-                if operation == 'get':
-                    if result is not None:
-                        redis_cache_hits_total.labels(
-                            cache_key_type=key_type
-                        ).inc()
-                    else:
-                        redis_cache_misses_total.labels(
-                            cache_key_type=key_type
-                        ).inc()
-
-                return result
-            finally:
-                duration = time.time() - start_time
-
-                # Track operation count and duration
-                redis_operations_total.labels(operation=operation).inc()
-                redis_operation_duration_seconds.labels(
-                    operation=operation
-                ).observe(duration)
-
-        return wrapper
-    return decorator
+    """Context manager to track database query duration"""
+    key = (operation, table)
+    observe_duration = _db_duration_observers.get(key)
+    if observe_duration is None:
+        observe_duration = database_query_duration_seconds.labels(
+            operation,
+            table
+        ).observe
+        _db_duration_observers[key] = observe_duration
+
+    start_time = perf_counter()
+    try:
+        yield
+    finally:
+        observe_duration(perf_counter() - start_time)
+
+
+@contextmanager
+def track_cache_operation(operation):
+    """Context manager to track cache operation count and duration"""
+    recorders = _cache_operation_recorders.get(operation)
+    if recorders is None:
+        recorders = (
+            redis_operations_total.labels(operation).inc,
+            redis_operation_duration_seconds.labels(operation).observe
+        )
+        _cache_operation_recorders[operation] = recorders
+    count_operation, observe_duration = recorders
+
+    start_time = perf_counter()
+    try:
+        yield
+    finally:
+        duration = perf_counter() - start_time
+
+        # Track operation count and duration
+        buffered_inc(count_operation)
+        observe_duration(duration)
 
 
 # =============================================================================
 # Helper Functions
 # =============================================================================
 
-def track_product_view(product_id: str, product_name: str, category: str):
+_hot_product_views = OrderedDict()
+_hot_products_added_to_cart = OrderedDict()
+
+
+def _track_hot_product(counter, recent: OrderedDict, product_id: str):
+    """Count a per-product event, evicting the least recently active product"""
+    child = recent.pop(product_id, None)
+    if child is None:
+        child = counter.labels(product_id)
+    recent[product_id] = child
+
+    if len(recent) > HOT_PRODUCTS_MAX:
+        evicted_id, _ = recent.popitem(last=False)
+        counter.remove(evicted_id)
+
+    child.inc()
+
+
+def track_product_view(product_id: str, category: str):
     """Track a product view"""
-    product_views_total.labels(
-        product_id=product_id,
-        product_name=product_name,
-        category=category
-    ).inc()
+    product_views_total.labels(category).inc()
+    _track_hot_product(hot_product_views_total, _hot_product_views, product_id)
 
 
-def track_add_to_cart(product_id: str, product_name: str):
+def track_add_to_cart(product_id: str):
     """Track adding a product to cart"""
-    products_added_to_cart_total.labels(
-        product_id=product_id,
-        product_name=product_name
-    ).inc()
+    products_added_to_cart_total.inc()
+    _track_hot_product(
+        hot_products_added_to_cart_total, _hot_products_added_to_cart, product_id
+    )
+
+
+# Shared implementation, bound to this service's cache metrics
+track_cache_result = make_track_cache_result(redis_cache_results_total)
+
+
+# Cache gets are timed inline by the caller and recorded here, rather than
+# through track_cache_operation, to keep the hot Redis path free of a
+# context manager frame
+_count_cache_get = redis_operations_total.labels('get').inc
+_observe_cache_get = redis_operation_duration_seconds.labels('get').observe
+
+
+def record_cache_get(key_type: str, hit: bool, duration: float):
+    """Track a cache get: its hit/miss result, the operation count and its duration"""
+    track_cache_result(key_type, hit)
+    buffered_inc(_count_cache_get)
+    _observe_cache_get(duration)
 
 
 def track_product_search(search_type: str):
     """Track a product search"""
-    product_search_queries_total.labels(
-        search_type=search_type
-    ).inc()
+    product_search_queries_total.labels(search_type).inc()
 
 
-def update_product_inventory(product_id: str, product_name: str, quantity: int):
+def update_product_inventory(product_id: str, quantity: int):
     """Update product inventory level"""
-    product_inventory_level.labels(
-        product_id=product_id,
-        product_name=product_name
-    ).set(quantity)
+    product_inventory_level.labels(product_id).set(quantity)
 
 
-def update_product_price(product_id: str, product_name: str, price: float, currency: str = 'USD'):
+_product_names = {}
+
+
+def update_product_info(product_id: str, product_name: str):
+    """Publish a product's name, replacing the series for its previous name"""
+    previous = _product_names.get(product_id)
+    if previous == product_name:
+        return
+    if previous is not None:
+        product_info.remove(product_id, previous)
+    _product_names[product_id] = product_name
+    product_info.labels(product_id, product_name).set(1)
+
+
+def update_product_price(product_id: str, price: float, currency: str = 'USD'):
     """Update product price"""
-    product_current_price.labels(
-        product_id=product_id,
-        product_name=product_name,
-        currency=currency
-    ).set(price)
+    product_current_price.labels(product_id, currency).set(price)
+
+
+# Label children for HTTP metrics, cached by label values so the per-request
+# path skips prometheus_client's labels() lookup. The HTTP middleware records
+# every request here, so this service has no per-endpoint decorator: it would
+# count each request twice
+_http_requests_children = {}
+_http_duration_children = {}
+
+
+def track_http_request(method: str, endpoint: str, status: int, duration: float):
+    """Track an HTTP request's count and duration"""
+    key = (method, endpoint, status)
+    counter = _http_requests_children.get(key)
+    if counter is None:
+        counter = http_requests_total.labels(method, endpoint, status)
+        _http_requests_children[key] = counter
+    counter.inc()
+
+    key = (method, endpoint)
+    histogram = _http_duration_children.get(key)
+    if histogram is None:
+        histogram = http_request_duration_seconds.labels(method, endpoint)
+        _http_duration_children[key] = histogram
+    histogram.observe(duration)
 
 
 def update_db_connection_stats(active: int, idle: int, max_conn: int):
@@ -275,12 +318,3 @@ def update_db_connection_stats(active: int, idle: int, max_conn: int):
     database_connections_active.set(active)
     database_connections_idle.set(idle)
     database_connections_max.set(max_conn)
-
-
-# =============================================================================
-# Metrics Endpoint
-# =============================================================================
-
-def get_metrics():
-    """Return Prometheus metrics in text format"""
-    return generate_latest()
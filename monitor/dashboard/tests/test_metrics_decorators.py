@@ -0,0 +1,88 @@
+"""
+Tests for the shared endpoint instrumentation in common/metrics_decorators.py
+Run from monitor/dashboard: python -m pytest tests
+"""
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+from common.metrics_decorators import make_track_endpoint_metrics
+
+
+@pytest.fixture
+def registry():
+    return CollectorRegistry()
+
+
+@pytest.fixture
+def track_endpoint_metrics(registry):
+    requests_total = Counter(
+        'http_requests_total',
+        'Total HTTP requests',
+        ['method', 'endpoint', 'status'],
+        registry=registry
+    )
+    duration_seconds = Histogram(
+        'http_request_duration_seconds',
+        'HTTP request duration in seconds',
+        ['method', 'endpoint'],
+        registry=registry
+    )
+    return make_track_endpoint_metrics(requests_total, duration_seconds)
+
+
+def _requests_total(registry, method, endpoint, status):
+    return registry.get_sample_value(
+        'http_requests_total',
+        {'method': method, 'endpoint': endpoint, 'status': str(status)}
+    )
+
+
+def test_handler_without_request(registry, track_endpoint_metrics):
+    """A Request parameter is injected so the method label is the real one"""
+    app = FastAPI()
+
+    @app.get('/api/users/{user_id}')
+    @track_endpoint_metrics('/api/users/{user_id}')
+    async def get_user(user_id: int):
+        return {'id': user_id}
+
+    response = TestClient(app).get('/api/users/42')
+
+    assert response.status_code == 200
+    assert response.json() == {'id': 42}
+    assert _requests_total(registry, 'GET', '/api/users/{user_id}', 200) == 1.0
+
+
+def test_handler_with_request(registry, track_endpoint_metrics):
+    """The handler's own Request is used and still passed through"""
+    app = FastAPI()
+
+    @app.post('/api/users/login')
+    @track_endpoint_metrics('/api/users/login')
+    async def login(request: Request):
+        return {'method': request.method}
+
+    response = TestClient(app).post('/api/users/login')
+
+    assert response.status_code == 200
+    assert response.json() == {'method': 'POST'}
+    assert _requests_total(registry, 'POST', '/api/users/login', 200) == 1.0
+
+
+def test_handler_with_string_annotated_request(registry, track_endpoint_metrics):
+    """A string annotation is resolved; no second Request parameter is added"""
+    app = FastAPI()
+
+    @app.put('/api/users/profile')
+    @track_endpoint_metrics('/api/users/profile')
+    async def update_profile(req: "Request"):
+        return {'method': req.method}
+
+    response = TestClient(app).put('/api/users/profile')
+
+    assert response.status_code == 200
+    assert response.json() == {'method': 'PUT'}
+    assert _requests_total(registry, 'PUT', '/api/users/profile', 200) == 1.0
@@ -3,9 +3,21 @@ E-Commerce Metrics Instrumentation for User Service
 Tracks user-related business metrics and technical metrics for Prometheus
 """
 
-from prometheus_client import Counter, Histogram, Gauge, generate_latest
-from functools import wraps
-import time
+from prometheus_client import Counter, Histogram, Gauge
+from .common.metrics_buckets import (
+    DATABASE_QUERY_DURATION_BUCKETS,
+    HTTP_REQUEST_DURATION_BUCKETS,
+)
+from .common.metrics_decorators import (
+    light_wraps,
+    make_track_endpoint_metrics,
+    route_template,
+)
+from .common.metrics_helpers import get_metrics, make_track_cache_result
+import logging
+from time import perf_counter
+
+logger = logging.getLogger(__name__)
 
 # =============================================================================
 # Business Metrics - User Service
@@ -79,7 +91,7 @@ http_request_duration_seconds = Histogram(
     'http_request_duration_seconds',
     'HTTP request duration in seconds',
     ['method', 'endpoint'],
-    buckets=[0.01, 0.05, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0]
+    buckets=HTTP_REQUEST_DURATION_BUCKETS
 )
 
 # =============================================================================
@@ -121,7 +133,7 @@ database_query_duration_seconds = Histogram(
     'database_query_duration_seconds',
     'Database query duration in seconds',
     ['operation', 'table'],
-    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0]
+    buckets=DATABASE_QUERY_DURATION_BUCKETS
 )
 
 database_connections_active = Gauge(
@@ -138,16 +150,10 @@ database_connections_idle = Gauge(
 # Cache Metrics
 # =============================================================================
 
-redis_cache_hits_total = Counter(
-    'redis_cache_hits_total',
-    'Total number of cache hits',
-    ['cache_key_type']
-)
-
-redis_cache_misses_total = Counter(
-    'redis_cache_misses_total',
-    'Total number of cache misses',
-    ['cache_key_type']
+redis_cache_results_total = Counter(
+    'redis_cache_results_total',
+    'Total number of cache lookups by result',
+    ['cache_key_type', 'result']  # result: hit, miss
 )
 
 redis_operations_total = Counter(
@@ -161,10 +167,11 @@ redis_operations_total = Counter(
 # =============================================================================
 
 # Failed Login Attempts (Security)
-failed_login_attempts_by_ip = Counter(
-    'failed_login_attempts_by_ip',
-    'Failed login attempts grouped by IP',
-    ['ip_address']
+# Not labeled by IP: that is one series per client, and under a brute-force
+# attack every new address would grow every scrape. Per-IP detail is logged.
+failed_login_attempts_total = Counter(
+    'failed_login_attempts_total',
+    'Total number of failed login attempts'
 )
 
 # Suspicious Activities
@@ -178,63 +185,63 @@ suspicious_activities_total = Counter(
 rate_limit_exceeded_total = Counter(
     'rate_limit_exceeded_total',
     'Total number of rate limit violations',
-    ['endpoint', 'user_id']
+    ['endpoint']  # user_id is logged, not labeled
 )
 
 # =============================================================================
-# Decorator Functions
+# Endpoint Names
 # =============================================================================
 
+# Route templates used as the `endpoint` label; pass these constants rather
+# than literals so every call site shares one interned string
+ENDPOINT_REGISTER = route_template('/api/users/register')
+ENDPOINT_LOGIN = route_template('/api/users/login')
+ENDPOINT_LOGOUT = route_template('/api/users/logout')
+ENDPOINT_PROFILE = route_template('/api/users/profile')
+ENDPOINT_PASSWORD = route_template('/api/users/password')
+ENDPOINT_USERS = route_template('/api/users')
+ENDPOINT_USER = route_template('/api/users/{user_id}')
+
+# Endpoint label values accepted from callers that pass a raw path; anything
+# else is reported as ENDPOINT_OTHER so probing arbitrary URLs adds no series
+ALLOWED_ROUTE_TEMPLATES = frozenset({
+    ENDPOINT_REGISTER,
+    ENDPOINT_LOGIN,
+    ENDPOINT_LOGOUT,
+    ENDPOINT_PROFILE,
+    ENDPOINT_PASSWORD,
+    ENDPOINT_USERS,
+    ENDPOINT_USER,
+})
+ENDPOINT_OTHER = 'other'
 
-def track_endpoint_metrics(endpoint_name):
-    """Decorator to track HTTP endpoint metrics"""
-    def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            start_time = time.time()
-            status_code = 200
-
-            try:
-                response = await func(*args, **kwargs)
-                if hasattr(response, 'status_code'):
-                    status_code = response.status_code
-                return response
-            except Exception as e:
-                status_code = 500
-                raise
-            finally:
-                duration = time.time() - start_time
-
-                http_requests_total.labels(
-                    method='POST',  # or extract from request
-                    endpoint=endpoint_name,
-                    status=status_code
-                ).inc()
+# =============================================================================
+# Decorator Functions
+# =============================================================================
 
-                http_request_duration_seconds.labels(
-                    method='POST',
-                    endpoint=endpoint_name
-                ).observe(duration)
 
-        return wrapper
-    return decorator
+# Shared implementation, bound to this service's HTTP metrics
+track_endpoint_metrics = make_track_endpoint_metrics(
+    http_requests_total,
+    http_request_duration_seconds
+)
 
 
 def track_auth_operation(operation):
     """Decorator to track authentication operations"""
     def decorator(func):
-        @wraps(func)
+        observe_duration = auth_operation_duration_seconds.labels(operation).observe
+
+        @light_wraps(func)
         async def wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_time = perf_counter()
 
             try:
                 result = await func(*args, **kwargs)
                 return result
             finally:
-                duration = time.time() - start_time
-                auth_operation_duration_seconds.labels(
-                    operation=operation
-                ).observe(duration)
+                duration = perf_counter() - start_time
+                observe_duration(duration)
 
         return wrapper
     return decorator
@@ -244,23 +251,79 @@ def track_auth_operation(operation):
 # Helper Functions
 # =============================================================================
 
+class _BoundCounters(dict):
+    """Bound inc methods of a counter's label children, keyed by label value(s)
+
+    The expected values are bound up front; anything else is bound on first use.
+    """
+
+    def __init__(self, counter, keys):
+        super().__init__()
+        self._counter = counter
+        for key in keys:
+            self._bind(key)
+
+    def _bind(self, key):
+        values = key if isinstance(key, tuple) else (key,)
+        inc = self[key] = self._counter.labels(*values).inc
+        return inc
+
+    __missing__ = _bind
+
+
+_registrations = _BoundCounters(
+    user_registrations_total, ('web', 'mobile', 'api')
+)
+_login_attempts = _BoundCounters(
+    user_login_attempts_total,
+    [(s, m) for s in ('success', 'failed') for m in ('email', 'social')]
+)
+_password_resets = _BoundCounters(
+    user_password_reset_requests_total, ('initiated', 'completed', 'failed')
+)
+_profile_updates = _BoundCounters(
+    user_profile_updates_total, ('email', 'name', 'address', 'preferences')
+)
+_email_verifications = _BoundCounters(
+    user_email_verifications_total, ('sent', 'verified', 'failed')
+)
+_account_actions = _BoundCounters(
+    user_account_actions_total, ('deactivate', 'reactivate', 'delete')
+)
+_jwt_issued = _BoundCounters(jwt_tokens_issued_total, ('access', 'refresh'))
+_jwt_validated = _BoundCounters(
+    jwt_tokens_validated_total, ('valid', 'expired', 'invalid')
+)
+_jwt_revoked = _BoundCounters(
+    jwt_tokens_revoked_total, ('logout', 'security', 'expired')
+)
+_suspicious_activities = _BoundCounters(
+    suspicious_activities_total,
+    ('brute_force', 'unusual_location', 'rapid_requests')
+)
+_rate_limits = _BoundCounters(
+    rate_limit_exceeded_total, (*ALLOWED_ROUTE_TEMPLATES, ENDPOINT_OTHER)
+)
+
+
 def track_user_registration(source: str = 'web'):
     """Track a new user registration"""
-    user_registrations_total.labels(source=source).inc()
+    _registrations[source]()
 
 
 def track_login_attempt(success: bool, method: str = 'email'):
     """Track a login attempt"""
-    status = 'success' if success else 'failed'
-    user_login_attempts_total.labels(
-        status=status,
-        method=method
-    ).inc()
+    _login_attempts['success' if success else 'failed', method]()
 
 
 def track_failed_login_by_ip(ip_address: str):
-    """Track failed login attempt by IP for security monitoring"""
-    failed_login_attempts_by_ip.labels(ip_address=ip_address).inc()
+    """Track failed login attempt; the IP goes to the logs for security monitoring"""
+    failed_login_attempts_total.inc()
+    logger.warning(f"Failed login attempt from ip_address={ip_address}")
+
+
+# Shared implementation, bound to this service's cache metrics
+track_cache_result = make_track_cache_result(redis_cache_results_total)
 
 
 def track_session_creation():
@@ -275,58 +338,47 @@ def update_active_sessions(count: int):
 
 def track_password_reset(status: str):
     """Track password reset requests"""
-    user_password_reset_requests_total.labels(status=status).inc()
+    _password_resets[status]()
 
 
 def track_profile_update(field: str):
     """Track profile field updates"""
-    user_profile_updates_total.labels(field=field).inc()
+    _profile_updates[field]()
 
 
 def track_email_verification(status: str):
     """Track email verification events"""
-    user_email_verifications_total.labels(status=status).inc()
+    _email_verifications[status]()
 
 
 def track_account_action(action: str):
     """Track account-level actions"""
-    user_account_actions_total.labels(action=action).inc()
+    _account_actions[action]()
 
 
 def track_jwt_issued(token_type: str = 'access'):
     """Track JWT token issuance"""
-    jwt_tokens_issued_total.labels(token_type=token_type).inc()
+    _jwt_issued[token_type]()
 
 
 def track_jwt_validated(status: str):
     """Track JWT token validation"""
-    jwt_tokens_validated_total.labels(status=status).inc()
+    _jwt_validated[status]()
 
 
 def track_jwt_revoked(reason: str):
     """Track JWT token revocation"""
-    jwt_tokens_revoked_total.labels(reason=reason).inc()
+    _jwt_revoked[reason]()
 
 
 def track_suspicious_activity(activity_type: str):
     """Track suspicious activities for security"""
-    suspicious_activities_total.labels(
-        activity_type=activity_type
-    ).inc()
+    _suspicious_activities[activity_type]()
 
 
 def track_rate_limit_exceeded(endpoint: str, user_id: str = 'anonymous'):
-    """Track rate limit violations"""
-    rate_limit_exceeded_total.labels(
-        endpoint=endpoint,
-        user_id=user_id
-    ).inc()
-
-
-# =============================================================================
-# Metrics Endpoint
-# =============================================================================
-
-def get_metrics():
-    """Return Prometheus metrics in text format"""
-    return generate_latest()
+    """Track rate limit violations; unknown endpoints are counted as 'other'"""
+    _rate_limits[
+        endpoint if endpoint in ALLOWED_ROUTE_TEMPLATES else ENDPOINT_OTHER
+    ]()
+    logger.info(f"Rate limit exceeded on endpoint={endpoint} user_id={user_id}")
@@ -9,7 +9,7 @@ from typing import List, Optional
 from uuid import UUID
 import logging
 from datetime import datetime
-from prometheus_client import Counter, Histogram, Gauge, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, Gauge, generate_latest
 
 # Configure logging FIRST (before using logger)
 logging.basicConfig(
@@ -195,7 +195,7 @@ async def metrics():
     except Exception:
         pass
 
-    return Response(content=generate_latest(), media_type="text/plain")
+    return Response(content=generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
 
 
 @app.get("/api/products", response_model=List[Product])
@@ -14,7 +14,7 @@ from typing import List, Optional
 from uuid import UUID
 import logging
 from datetime import datetime, timedelta
-from prometheus_client import Counter, Histogram, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
 import secrets
 
 # Configure logging FIRST
@@ -240,7 +240,7 @@ async def readiness_check():
 @app.get("/metrics")
 async def metrics():
     """Prometheus metrics endpoint"""
-    return Response(content=generate_latest(), media_type="text/plain")
+    return Response(content=generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
 
 
 @app.post("/api/users/register", response_model=User, status_code=201)